@@ -3,34 +3,129 @@ import nltk
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
 from textblob import TextBlob
 import pandas as pd
+import numpy as np
 from collections import Counter
+from functools import lru_cache
+from heapq import nlargest
+from operator import itemgetter
 import re
+import threading
 from transformers import pipeline
+import torch
 import spacy
 
-# Download necessary NLTK data
-nltk.download('vader_lexicon')
-nltk.download('punkt')
-nltk.download('stopwords')
+# Download necessary NLTK data, skipping the network when it is already installed
+for resource, path in [('vader_lexicon', 'sentiment/vader_lexicon.zip'),
+                       ('punkt', 'tokenizers/punkt'),
+                       ('stopwords', 'corpora/stopwords')]:
+    try:
+        nltk.data.find(path)
+    except LookupError:
+        nltk.download(resource)
+
+# Parsed once per process and shared read-only by every analyzer instance
+_SID = SentimentIntensityAnalyzer()
+_STOPWORDS = frozenset(nltk.corpus.stopwords.words('english'))
+
+# Lemmas are never used. noun_chunks needs the parser plus the POS tags set
+# by tagger and attribute_ruler, ents needs ner, and tok2vec feeds them
+_UNUSED_PIPES = ["lemmatizer"]
+
+# URLs are stripped before parsing; preprocess_text also drops special
+# characters in the same scan. Both share one URL pattern so they cannot drift.
+_URL_PATTERN = r'http\S+'
+_URL_RE = re.compile(_URL_PATTERN)
+_CLEAN_RE = re.compile(_URL_PATTERN + r'|[^\w\s]')
+
+# Order of the values returned by the cached VADER scorer
+_VADER_KEYS = ("neg", "neu", "pos", "compound")
+_COMPOUND = _VADER_KEYS.index("compound")
+
+# Sentiment categories encoded as small integers for vectorized aggregation
+_CATEGORY_NAMES = np.array(['positive', 'neutral', 'negative'])
+_CATEGORY_CODES = {name: code for code, name in enumerate(_CATEGORY_NAMES.tolist())}
+
+
+@lru_cache(maxsize=None)
+def _load_nlp():
+    """Load the spaCy model once per process"""
+    # The model is pinned in requirements.txt; fail fast instead of
+    # downloading it from inside a request
+    if not spacy.util.is_package("en_core_web_sm"):
+        raise RuntimeError("spaCy model en_core_web_sm is not installed; "
+                           "run `pip install -r requirements.txt`")
+    spacy.prefer_gpu()
+    return spacy.load("en_core_web_sm", exclude=_UNUSED_PIPES)
+
+
+def _categorize(compound):
+    """Map compound scores to category codes in one vectorized pass"""
+    return np.where(compound >= 0.05, 0, np.where(compound <= -0.05, 2, 1)).astype(np.int8)
+
+
+def _aggregate_sentiment(compound, categories):
+    """Mean compound score and category fractions from parallel arrays"""
+    if not len(categories):
+        return {"compound": 0, "positive": 0, "neutral": 0, "negative": 0}
+    
+    fractions = np.bincount(categories, minlength=3) / len(categories)
+    return {
+        "compound": float(compound.mean()),
+        "positive": float(fractions[0]),
+        "neutral": float(fractions[1]),
+        "negative": float(fractions[2])
+    }
+
 
 class SentimentAnalyzer:
-    def __init__(self, use_transformers=False):
-        self.sid = SentimentIntensityAnalyzer()
-        self.stopwords = set(nltk.corpus.stopwords.words('english'))
+    def __init__(self, use_transformers=False, n_process=1, transformer_batch_size=32,
+                 quantize_transformer=True, torch_threads=None,
+                 vader_cache_size=100_000, transformer_cache_size=10_000,
+                 transformer_skip_threshold=0.75):
+        self.sid = _SID
+        self.stopwords = _STOPWORDS
+        
+        # Cache scores by text; reddit titles and comments repeat often
+        # (crossposts, bots, "[deleted]")
+        self._vader = lru_cache(maxsize=vader_cache_size)(self._vader_scores)
+        self._transformer_cache = {}
+        self.transformer_cache_size = transformer_cache_size
+        self._transformer_hits = 0
+        self._transformer_misses = 0
+        # The API runs analyses concurrently in its threadpool: one lock guards
+        # the transformer cache and counters, another serializes the HF pipeline
+        self._cache_lock = threading.Lock()
+        self._model_lock = threading.Lock()
         
         # Optional: more advanced sentiment model
         self.use_transformers = use_transformers
+        self.transformer_batch_size = transformer_batch_size
+        # Texts whose VADER |compound| reaches this are confident enough to skip
+        # the transformer; values above 1 send every text through it
+        self.transformer_skip_threshold = transformer_skip_threshold
         if use_transformers:
-            self.transformer_model = pipeline("sentiment-analysis")
-        
-        # For topic extraction
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except:
-            # If model isn't downloaded yet
-            import subprocess
-            subprocess.run(["python", "-m", "spacy", "download", "en_core_web_sm"])
-            self.nlp = spacy.load("en_core_web_sm")
+            if torch_threads:
+                torch.set_num_threads(torch_threads)
+            device = 0 if torch.cuda.is_available() else -1
+            self.transformer_model = pipeline("sentiment-analysis",
+                                              model="distilbert-base-uncased-finetuned-sst-2-english",
+                                              device=device,
+                                              batch_size=transformer_batch_size)
+            if quantize_transformer and device == -1:
+                # int8 dynamic quantization of the linear layers for faster CPU inference
+                self.transformer_model.model = torch.quantization.quantize_dynamic(
+                    self.transformer_model.model, {torch.nn.Linear}, dtype=torch.qint8)
+        
+        # For topic extraction. n_process > 1 parses batches in worker processes,
+        # which on Windows/macOS requires the caller to be guarded by
+        # `if __name__ == "__main__"`
+        self.n_process = n_process
+        self.nlp = _load_nlp()
+    
+    def _vader_scores(self, text):
+        """Return VADER scores for a text as a tuple ordered like _VADER_KEYS"""
+        scores = self.sid.polarity_scores(text)
+        return tuple(scores[key] for key in _VADER_KEYS)
     
     def analyze_text(self, text):
         """Analyze sentiment of a single text"""
@@ -38,94 +133,214 @@ class SentimentAnalyzer:
             return {"compound": 0, "pos": 0, "neu": 0, "neg": 0}
         
         # VADER sentiment analysis
-        sentiment = self.sid.polarity_scores(text)
+        sentiment = dict(zip(_VADER_KEYS, self._vader(text)))
         
         # Optional: Use more advanced transformer model
         if self.use_transformers:
+            self.add_transformer_sentiment([text], [sentiment])
+        
+        return sentiment
+    
+    def score_texts(self, texts):
+        """Return VADER scores as an (N, 4) array with columns ordered like _VADER_KEYS"""
+        vader = self._vader
+        empty = (0.0,) * len(_VADER_KEYS)
+        scores = [vader(text) if text and text.strip() != "" else empty for text in texts]
+        return np.array(scores, dtype=np.float64).reshape(len(texts), len(_VADER_KEYS))
+    
+    def analyze_texts(self, texts, scores=None):
+        """Analyze sentiment of a list of texts in one batch, reusing VADER scores if given"""
+        if scores is None:
+            scores = self.score_texts(texts)
+        sentiments = [dict(zip(_VADER_KEYS, row)) for row in scores.tolist()]
+        
+        # Optional: Use more advanced transformer model
+        if self.use_transformers:
+            self.add_transformer_sentiment(texts, sentiments)
+        
+        return sentiments
+    
+    def add_transformer_sentiment(self, texts, sentiments):
+        """Add transformer labels to VADER results using batched inference"""
+        cache = self._transformer_cache
+        threshold = self.transformer_skip_threshold
+        # Keyed by the text itself so distinct texts can never share a label
+        keys = [text if text and text.strip() != "" and abs(sentiment['compound']) < threshold
+                else None
+                for text, sentiment in zip(texts, sentiments)]
+        
+        # Look up cached labels and collect each distinct uncached text once
+        labels = {}
+        pending = {}
+        with self._cache_lock:
+            for key in keys:
+                if key is None or key in labels or key in pending:
+                    continue
+                if key in cache:
+                    labels[key] = cache[key]
+                else:
+                    pending[key] = None
+            self._transformer_hits += sum(1 for key in keys if key in labels)
+            self._transformer_misses += len(pending)
+        
+        if pending:
+            # Sort by length so each batch pads to similarly sized inputs
+            batch = sorted(pending, key=len)
             try:
-                result = self.transformer_model(text[:512])[0]  # Truncate to avoid token limit
-                sentiment['transformer_label'] = result['label']
-                sentiment['transformer_score'] = result['score']
+                # Truncate to avoid token limit; inference_mode skips autograd bookkeeping
+                with self._model_lock, torch.inference_mode():
+                    results = self.transformer_model([text[:512] for text in batch],
+                                                     batch_size=self.transformer_batch_size,
+                                                     truncation=True)
             except Exception as e:
                 print(f"Transformer model error: {e}")
+                results = []
+            
+            with self._cache_lock:
+                for text, result in zip(batch, results):
+                    labels[text] = (result['label'], result['score'])
+                    if self.transformer_cache_size <= 0:
+                        continue
+                    if len(cache) >= self.transformer_cache_size:
+                        # Evict the oldest entry to keep the cache bounded
+                        del cache[next(iter(cache))]
+                    cache[text] = labels[text]
         
-        return sentiment
+        for key, sentiment in zip(keys, sentiments):
+            if key in labels:
+                sentiment['transformer_label'], sentiment['transformer_score'] = labels[key]
+    
+    def clear_cache(self):
+        """Drop all cached sentiment results"""
+        self._vader.cache_clear()
+        with self._cache_lock:
+            self._transformer_cache.clear()
+            self._transformer_hits = 0
+            self._transformer_misses = 0
+    
+    def cache_stats(self):
+        """Return hit/miss counts and sizes of the sentiment caches"""
+        vader_info = self._vader.cache_info()
+        with self._cache_lock:
+            transformer_stats = {
+                'hits': self._transformer_hits,
+                'misses': self._transformer_misses,
+                'size': len(self._transformer_cache),
+                'max_size': self.transformer_cache_size
+            }
+        return {
+            'vader': {
+                'hits': vader_info.hits,
+                'misses': vader_info.misses,
+                'size': vader_info.currsize,
+                'max_size': vader_info.maxsize
+            },
+            'transformer': transformer_stats
+        }
     
     def preprocess_text(self, text):
-        """Clean text for topic extraction"""
+        """Lowercase text and strip URLs and punctuation (kept for external callers)"""
         if not text or not isinstance(text, str):
             return ""
         
-        # Remove URLs
-        text = re.sub(r'http\S+', '', text)
-        # Remove special characters
-        text = re.sub(r'[^\w\s]', '', text)
-        # Convert to lowercase
-        text = text.lower()
-        
-        return text
+        # Remove URLs and special characters, then convert to lowercase
+        return _CLEAN_RE.sub('', text).lower()
     
     def extract_topics(self, texts, top_n=10):
         """Extract key topics from a collection of texts"""
-        all_text = " ".join([self.preprocess_text(text) for text in texts])
-        doc = self.nlp(all_text)
+        # Keep original casing and punctuation so the parser and NER see real
+        # text; only URLs are stripped
+        cleaned_texts = [_URL_RE.sub('', text) for text in texts
+                         if text and isinstance(text, str)]
+        docs = self.nlp.pipe(cleaned_texts, batch_size=64, n_process=self.n_process)
         
-        # Extract noun phrases and named entities
+        # Extract noun phrases and named entities, lowercased once so casing
+        # variants count as the same topic
+        stopwords = self.stopwords
         topics = []
-        for chunk in doc.noun_chunks:
-            if chunk.text.lower() not in self.stopwords and len(chunk.text.split()) <= 3:
-                topics.append(chunk.text)
-        
-        for ent in doc.ents:
-            if ent.text.lower() not in self.stopwords:
-                topics.append(ent.text)
+        for doc in docs:
+            for chunk in doc.noun_chunks:
+                lc = chunk.text.lower()
+                if lc not in stopwords and len(lc.split()) <= 3:
+                    topics.append(lc)
+            
+            for ent in doc.ents:
+                lc = ent.text.lower()
+                if lc not in stopwords:
+                    topics.append(lc)
         
         # Count frequencies
         topic_counter = Counter(topics)
         
-        # Return top N topics
+        # Return top N topics without sorting every distinct topic
         return [{"topic": topic, "count": count} 
-                for topic, count in topic_counter.most_common(top_n)]
+                for topic, count in nlargest(top_n, topic_counter.items(), key=itemgetter(1))]
     
     def analyze_posts(self, posts):
         """Analyze a list of posts"""
         if not posts:
             return []
         
-        for post in posts:
-            # Analyze title sentiment
-            title_sentiment = self.analyze_text(post.get('title', ''))
-            
-            # Analyze content sentiment
-            content_sentiment = self.analyze_text(post.get('text', ''))
-            
-            # Calculate weighted sentiment (title has higher weight)
-            compound_sentiment = 0.7 * title_sentiment['compound'] + 0.3 * content_sentiment['compound']
-            
-            # Add sentiment data
-            post['sentiment'] = {
+        # Score every title and body in one pass over a flat list
+        n = len(posts)
+        all_titles = [post.title for post in posts]
+        all_texts = [post.text for post in posts]
+        texts = all_titles + all_texts
+        
+        # Statistics run on contiguous score columns; per-post dicts are only
+        # built for the response once they are done
+        scores = self.score_texts(texts)
+        compound = scores[:, _COMPOUND]
+        title_compound, body_compound = compound[:n], compound[n:]
+        
+        # Calculate weighted sentiment (title has higher weight)
+        compound_sentiment = 0.7 * title_compound + 0.3 * body_compound
+        
+        # Add sentiment category
+        category_codes = _categorize(compound_sentiment)
+        categories = _CATEGORY_NAMES[category_codes]
+        overall_sentiment = _aggregate_sentiment(compound_sentiment, category_codes)
+        
+        # Add sentiment data
+        sentiments = self.analyze_texts(texts, scores)
+        for post, title_sentiment, content_sentiment, weighted, category in zip(
+                posts, sentiments[:n], sentiments[n:], compound_sentiment.tolist(), categories.tolist()):
+            post.sentiment = {
                 'title': title_sentiment,
                 'content': content_sentiment,
-                'compound': compound_sentiment
+                'compound': weighted
             }
-            
-            # Add sentiment category
-            if compound_sentiment >= 0.05:
-                post['sentiment_category'] = 'positive'
-            elif compound_sentiment <= -0.05:
-                post['sentiment_category'] = 'negative'
-            else:
-                post['sentiment_category'] = 'neutral'
+            post.sentiment_category = category
         
         # Extract topics from all posts
-        all_titles = [post.get('title', '') for post in posts]
-        all_texts = [post.get('text', '') for post in posts]
-        topics = self.extract_topics(all_titles + all_texts)
+        topics = self.extract_topics(texts)
         
         return {
             'posts': posts,
             'topics': topics,
-            'overall_sentiment': self.calculate_overall_sentiment(posts)
+            'overall_sentiment': overall_sentiment
+        }
+    
+    def analyze_comments(self, comments):
+        """Analyze a list of comments"""
+        # Add sentiment analysis to all comments in one batch
+        texts = [comment.text for comment in comments]
+        scores = self.score_texts(texts)
+        compound = scores[:, _COMPOUND]
+        
+        # Add sentiment category
+        category_codes = _categorize(compound)
+        categories = _CATEGORY_NAMES[category_codes]
+        overall_sentiment = _aggregate_sentiment(compound, category_codes)
+        
+        sentiments = self.analyze_texts(texts, scores)
+        for comment, sentiment, category in zip(comments, sentiments, categories.tolist()):
+            comment.sentiment = sentiment
+            comment.sentiment_category = category
+        
+        return {
+            "comments": comments,
+            "overall_sentiment": overall_sentiment
         }
     
     def calculate_overall_sentiment(self, posts):
@@ -133,12 +348,10 @@ class SentimentAnalyzer:
         if not posts:
             return {"compound": 0, "positive": 0, "neutral": 0, "negative": 0}
         
-        sentiment_values = [post['sentiment']['compound'] for post in posts]
-        sentiment_categories = [post['sentiment_category'] for post in posts]
+        n = len(posts)
+        compound = np.fromiter((post.sentiment['compound'] for post in posts),
+                               dtype=np.float64, count=n)
+        categories = np.fromiter((_CATEGORY_CODES[post.sentiment_category] for post in posts),
+                                 dtype=np.int8, count=n)
         
-        return {
-            "compound": sum(sentiment_values) / len(sentiment_values),
-            "positive": sentiment_categories.count('positive') / len(sentiment_categories),
-            "neutral": sentiment_categories.count('neutral') / len(sentiment_categories),
-            "negative": sentiment_categories.count('negative') / len(sentiment_categories)
-        }
\ No newline at end of file
+        return _aggregate_sentiment(compound, categories)
\ No newline at end of file
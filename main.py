@@ -1,6 +1,8 @@
 # main.py
 from fastapi import FastAPI, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
 import uvicorn
 from typing import List, Optional
 from pydantic import BaseModel
@@ -10,7 +12,8 @@ from datetime import datetime, timedelta
 from reddit_scraper import RedditScraper
 from sentiment_analyzer import SentimentAnalyzer
 
-app = FastAPI(title="Reddit Sentiment Analysis API")
+# orjson serializes the large nested analysis payloads much faster than stdlib json
+app = FastAPI(title="Reddit Sentiment Analysis API", default_response_class=ORJSONResponse)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -21,10 +24,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize components
+# Initialize components (one Reddit client shared across requests)
 scraper = RedditScraper()
 analyzer = SentimentAnalyzer(use_transformers=False)  # Set to True if you want to use transformers
 
+# Upper bound on post IDs accepted by the multi-post comments endpoint
+MAX_POST_IDS = 20
+
 # Pydantic models for response types
 class Topic(BaseModel):
     topic: str
@@ -53,75 +59,95 @@ class PostAnalysisResponse(BaseModel):
     topics: List[Topic]
     overall_sentiment: SentimentData
 
+@app.on_event("shutdown")
+async def close_scraper():
+    await scraper.close()
+
 # API endpoints
 @app.get("/")
 def read_root():
     return {"message": "Reddit Sentiment Analysis API"}
 
 @app.get("/trending")
-def get_trending_topics(limit: int = Query(10, ge=1, le=50)):
+async def get_trending_topics(limit: int = Query(10, ge=1, le=50)):
     """Get trending subreddits"""
     try:
-        topics = scraper.get_trending_topics(limit=limit)
+        topics = await scraper.get_trending_topics(limit=limit)
         return {"trending_subreddits": topics}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/subreddit/{subreddit_name}")
-def analyze_subreddit(
+async def analyze_subreddit(
     subreddit_name: str, 
     limit: int = Query(25, ge=1, le=100)
 ):
     """Analyze posts from a specific subreddit"""
     try:
-        posts = scraper.get_hot_posts(subreddit_name, limit=limit)
-        analysis = analyzer.analyze_posts(posts)
-        return analysis
+        posts = await scraper.get_hot_posts(subreddit_name, limit=limit)
+        # Run CPU-bound analysis off the event loop so other requests keep fetching
+        analysis = await run_in_threadpool(analyzer.analyze_posts, posts)
+        # Skip jsonable_encoder; orjson serializes the post dataclasses natively
+        return ORJSONResponse(analysis)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/search")
-def search_and_analyze(
+async def search_and_analyze(
     query: str,
     limit: int = Query(50, ge=1, le=200)
 ):
     """Search posts and analyze sentiment"""
     try:
-        posts = scraper.search_topics(query, limit=limit)
-        analysis = analyzer.analyze_posts(posts)
-        return analysis
+        posts = await scraper.search_topics(query, limit=limit)
+        # Run CPU-bound analysis off the event loop so other requests keep fetching
+        analysis = await run_in_threadpool(analyzer.analyze_posts, posts)
+        # Skip jsonable_encoder; orjson serializes the post dataclasses natively
+        return ORJSONResponse(analysis)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/post/{post_id}/comments")
-def get_post_comments(
+async def get_post_comments(
     post_id: str,
     limit: int = Query(100, ge=1, le=500)
 ):
     """Get and analyze comments from a specific post"""
     try:
-        comments = scraper.get_post_comments(post_id, limit=limit)
+        comments = await scraper.get_post_comments(post_id, limit=limit)
+        
+        # Run CPU-bound analysis off the event loop so other requests keep fetching
+        analysis = await run_in_threadpool(analyzer.analyze_comments, comments)
+        # Skip jsonable_encoder; orjson serializes the comment dataclasses natively
+        return ORJSONResponse(analysis)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/comments")
+async def get_comments_for_posts(
+    post_ids: List[str] = Query(...),
+    limit: int = Query(100, ge=1, le=500)
+):
+    """Get and analyze comments from several posts"""
+    # Each ID costs its own Reddit round-trips, so cap the total per request
+    if len(post_ids) > MAX_POST_IDS:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {MAX_POST_IDS} post_ids per request")
+    
+    try:
+        comments_by_post, errors = await scraper.get_comments_for_posts(post_ids, limit=limit)
         
-        # Add sentiment analysis to each comment
-        for comment in comments:
-            sentiment = analyzer.analyze_text(comment.get('text', ''))
-            comment['sentiment'] = sentiment
-            
-            # Add sentiment category
-            if sentiment['compound'] >= 0.05:
-                comment['sentiment_category'] = 'positive'
-            elif sentiment['compound'] <= -0.05:
-                comment['sentiment_category'] = 'negative'
-            else:
-                comment['sentiment_category'] = 'neutral'
+        # Run CPU-bound analysis off the event loop so other requests keep fetching
+        analyses = await run_in_threadpool(
+            lambda: {post_id: analyzer.analyze_comments(comments)
+                     for post_id, comments in comments_by_post.items()})
         
-        # Calculate overall sentiment
-        overall_sentiment = analyzer.calculate_overall_sentiment(comments)
+        # Posts that could not be fetched are reported individually
+        for post_id, error in errors.items():
+            analyses[post_id] = {"error": error}
         
-        return {
-            "comments": comments,
-            "overall_sentiment": overall_sentiment
-        }
+        # Skip jsonable_encoder; orjson serializes the comment dataclasses natively
+        return ORJSONResponse(analyses)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,77 +1,165 @@
 # reddit_scraper.py
-import praw
+import asyncpraw
 import pandas as pd
 from datetime import datetime
+import asyncio
+import functools
+import inspect
 import os
+from dataclasses import dataclass, replace
+from typing import Optional
+from cachetools import TTLCache
+from cachetools.keys import hashkey
 from dotenv import load_dotenv
 
 load_dotenv()  # Load environment variables
 
+@dataclass(slots=True)
+class RedditPost:
+    id: str
+    title: str
+    text: str
+    score: int
+    num_comments: int
+    created_utc: str
+    url: str
+    author: str
+    subreddit: str
+    # Filled in by SentimentAnalyzer.analyze_posts
+    sentiment: Optional[dict] = None
+    sentiment_category: Optional[str] = None
+
+@dataclass(slots=True)
+class RedditComment:
+    id: str
+    text: str
+    score: int
+    created_utc: str
+    author: str
+    # Filled in by SentimentAnalyzer.analyze_comments
+    sentiment: Optional[dict] = None
+    sentiment_category: Optional[str] = None
+
+def _ttl_cached(method):
+    """Reuse a method's results for the same arguments until the scraper's TTL expires"""
+    signature = inspect.signature(method)
+    
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        # Normalize positional, keyword and default arguments to one key
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = hashkey(method.__name__, *bound.args[1:], **bound.kwargs)
+        items = self._cache.get(key)
+        if items is None:
+            items = await method(self, *args, **kwargs)
+            self._cache[key] = items
+        # The analyzer annotates returned items in place, so hand out copies
+        return [replace(item) for item in items]
+    return wrapper
+
 class RedditScraper:
-    def __init__(self):
-        # Initialize the Reddit API client
-        self.reddit = praw.Reddit(
+    def __init__(self, cache_ttl=60, cache_size=1024):
+        # Initialize the Reddit API client. The HTTP session is opened lazily
+        # on the first request and shared by every call on this instance.
+        self.reddit = asyncpraw.Reddit(
             client_id=os.getenv("REDDIT_CLIENT_ID"),
             client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
             user_agent="sentiment_analysis_dashboard/1.0"
         )
+        
+        # Short-lived cache of listings so repeated requests skip the Reddit
+        # round-trip and stay under the rate limit
+        self._cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+    
+    async def close(self):
+        """Close the underlying HTTP session"""
+        await self.reddit.close()
     
-    def get_trending_topics(self, limit=10):
+    async def get_trending_topics(self, limit=10):
         """Get trending subreddits"""
-        trending_subreddits = self.reddit.trending_subreddits()
-        return list(trending_subreddits)[:limit]
+        # Async PRAW has no trending endpoint; popular subreddits are the closest listing
+        return [subreddit.display_name
+                async for subreddit in self.reddit.subreddits.popular(limit=limit)]
     
-    def get_hot_posts(self, subreddit_name, limit=25):
+    @_ttl_cached
+    async def get_hot_posts(self, subreddit_name, limit=25):
         """Get hot posts from a subreddit"""
-        subreddit = self.reddit.subreddit(subreddit_name)
+        subreddit = await self.reddit.subreddit(subreddit_name)
         posts = []
         
-        for post in subreddit.hot(limit=limit):
-            posts.append({
-                'id': post.id,
-                'title': post.title,
-                'text': post.selftext,
-                'score': post.score,
-                'num_comments': post.num_comments,
-                'created_utc': datetime.fromtimestamp(post.created_utc).isoformat(),
-                'url': post.url,
-                'author': str(post.author),
-                'subreddit': subreddit_name
-            })
+        async for post in subreddit.hot(limit=limit):
+            posts.append(RedditPost(
+                id=post.id,
+                title=post.title,
+                text=post.selftext,
+                score=post.score,
+                num_comments=post.num_comments,
+                created_utc=datetime.fromtimestamp(post.created_utc).isoformat(),
+                url=post.url,
+                author=str(post.author),
+                subreddit=subreddit_name
+            ))
         
         return posts
     
-    def get_post_comments(self, post_id, limit=100):
+    @_ttl_cached
+    async def get_post_comments(self, post_id, limit=100):
         """Get comments from a specific post"""
-        submission = self.reddit.submission(id=post_id)
-        submission.comments.replace_more(limit=0)  # Flatten comment tree
+        submission = await self.reddit.submission(post_id)
+        await submission.comments.replace_more(limit=0)  # Flatten comment tree
         
         comments = []
         for comment in submission.comments.list()[:limit]:
-            comments.append({
-                'id': comment.id,
-                'text': comment.body,
-                'score': comment.score,
-                'created_utc': datetime.fromtimestamp(comment.created_utc).isoformat(),
-                'author': str(comment.author)
-            })
+            comments.append(RedditComment(
+                id=comment.id,
+                text=comment.body,
+                score=comment.score,
+                created_utc=datetime.fromtimestamp(comment.created_utc).isoformat(),
+                author=str(comment.author)
+            ))
         
         return comments
     
-    def search_topics(self, query, limit=100):
+    async def get_comments_for_posts(self, post_ids, limit=100, max_concurrency=4):
+        """Get comments from several posts concurrently, with per-post fetch errors"""
+        # Bound in-flight requests to stay within Reddit's rate limit
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch(post_id):
+            async with semaphore:
+                return await self.get_post_comments(post_id, limit=limit)
+        
+        # A deleted or invalid post fails on its own instead of the whole batch
+        results = await asyncio.gather(*(fetch(post_id) for post_id in post_ids),
+                                       return_exceptions=True)
+        
+        comments_by_post = {}
+        errors = {}
+        for post_id, result in zip(post_ids, results):
+            if isinstance(result, Exception):
+                errors[post_id] = str(result)
+            else:
+                comments_by_post[post_id] = result
+        
+        return comments_by_post, errors
+    
+    @_ttl_cached
+    async def search_topics(self, query, limit=100):
         """Search posts by query term"""
+        subreddit = await self.reddit.subreddit("all")
         posts = []
-        for submission in self.reddit.subreddit("all").search(query, limit=limit):
-            posts.append({
-                'id': submission.id,
-                'title': submission.title,
-                'text': submission.selftext,
-                'score': submission.score,
-                'num_comments': submission.num_comments,
-                'created_utc': datetime.fromtimestamp(submission.created_utc).isoformat(),
-                'url': submission.url,
-                'author': str(submission.author),
-                'subreddit': submission.subreddit.display_name
-            })
+        async for submission in subreddit.search(query, limit=limit):
+            posts.append(RedditPost(
+                id=submission.id,
+                title=submission.title,
+                text=submission.selftext,
+                score=submission.score,
+                num_comments=submission.num_comments,
+                created_utc=datetime.fromtimestamp(submission.created_utc).isoformat(),
+                url=submission.url,
+                author=str(submission.author),
+                subreddit=submission.subreddit.display_name
+            ))
         
         return posts
\ No newline at end of file
@@ -0,0 +1,102 @@
+# test_analyzer.py
+import sys
+import threading
+
+import pytest
+
+try:
+    import analyzer
+except (ImportError, LookupError) as e:
+    # Missing packages, or NLTK data that could not be downloaded
+    pytest.skip(f"analyzer dependencies unavailable: {e}", allow_module_level=True)
+
+requires_spacy_model = pytest.mark.skipif(
+    not analyzer.spacy.util.is_package("en_core_web_sm"),
+    reason="spaCy model en_core_web_sm is not installed")
+
+
+class FakeTransformer:
+    """Stands in for the HF pipeline and records how many texts it scored"""
+    def __init__(self, labels=None):
+        self.calls = 0
+        self.labels = labels or {}
+
+    def __call__(self, texts, **kwargs):
+        self.calls += len(texts)
+        return [{"label": self.labels.get(text, "POSITIVE"), "score": 0.9} for text in texts]
+
+
+@pytest.fixture
+def offline_analyzer(monkeypatch):
+    # Topic extraction is not exercised here, so skip loading the spaCy model
+    monkeypatch.setattr(analyzer, "_load_nlp", lambda: None)
+    return analyzer.SentimentAnalyzer(transformer_cache_size=4, transformer_skip_threshold=2)
+
+
+@requires_spacy_model
+def test_loaded_pipeline_yields_noun_chunks():
+    doc = analyzer._load_nlp()("The new iPhone camera is great")
+    assert [chunk.text for chunk in doc.noun_chunks] == ["The new iPhone camera"]
+
+
+@requires_spacy_model
+def test_extract_topics_includes_noun_chunks():
+    topics = analyzer.SentimentAnalyzer().extract_topics(["The camera is great"])
+    assert {"topic": "the camera", "count": 1} in topics
+
+
+def test_transformer_cache_survives_concurrent_eviction(offline_analyzer):
+    offline_analyzer.transformer_model = FakeTransformer()
+    texts = [f"text number {i}" for i in range(50)]
+    errors = []
+
+    def hammer(offset):
+        try:
+            for i in range(300):
+                batch = [texts[(offset + i + j) % len(texts)] for j in range(3)]
+                sentiments = [{"compound": 0.0} for _ in batch]
+                offline_analyzer.add_transformer_sentiment(batch, sentiments)
+                assert all(s["transformer_label"] == "POSITIVE" for s in sentiments)
+        except Exception as e:
+            errors.append(e)
+
+    # Switch threads as often as possible so evictions interleave
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=hammer, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert errors == []
+    stats = offline_analyzer.cache_stats()['transformer']
+    assert stats['size'] <= 4
+    assert stats['hits'] + stats['misses'] == 8 * 300 * 3
+
+
+def test_transformer_cache_keeps_labels_per_text(offline_analyzer):
+    offline_analyzer.transformer_model = FakeTransformer({"awful": "NEGATIVE"})
+    texts = ["great", "awful", "great"]
+    sentiments = [{"compound": 0.0} for _ in texts]
+
+    offline_analyzer.add_transformer_sentiment(texts, sentiments)
+
+    assert [s["transformer_label"] for s in sentiments] == ["POSITIVE", "NEGATIVE", "POSITIVE"]
+    assert offline_analyzer.transformer_model.calls == 2
+
+
+def test_transformer_cache_size_zero_disables_caching(offline_analyzer):
+    offline_analyzer.transformer_model = FakeTransformer()
+    offline_analyzer.transformer_cache_size = 0
+
+    for _ in range(2):
+        sentiments = [{"compound": 0.0}]
+        offline_analyzer.add_transformer_sentiment(["great"], sentiments)
+        assert sentiments[0]["transformer_label"] == "POSITIVE"
+
+    assert offline_analyzer.transformer_model.calls == 2
+    assert offline_analyzer.cache_stats()['transformer']['size'] == 0
@@ -0,0 +1,74 @@
+# test_scraper.py
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+scraper = pytest.importorskip("scraper")
+
+
+class FakeComments:
+    def __init__(self, comments):
+        self._comments = comments
+    
+    async def replace_more(self, limit=0):
+        return []
+    
+    def list(self):
+        return self._comments
+
+
+class FakeReddit:
+    """Stands in for asyncpraw.Reddit and counts submission fetches"""
+    def __init__(self, **kwargs):
+        self.fetches = []
+    
+    async def submission(self, post_id):
+        self.fetches.append(post_id)
+        if post_id == "missing":
+            raise LookupError("post not found")
+        comment = SimpleNamespace(id=f"{post_id}_c1", body="nice post", score=1,
+                                  created_utc=datetime(2024, 1, 1).timestamp(), author="someone")
+        return SimpleNamespace(comments=FakeComments([comment]))
+    
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def reddit_scraper(monkeypatch):
+    monkeypatch.setattr(scraper.asyncpraw, "Reddit", FakeReddit)
+    return scraper.RedditScraper()
+
+
+def test_get_comments_for_posts_reports_failures_per_post(reddit_scraper):
+    comments_by_post, errors = asyncio.run(
+        reddit_scraper.get_comments_for_posts(["abc", "missing", "def"]))
+    
+    assert sorted(comments_by_post) == ["abc", "def"]
+    assert comments_by_post["abc"][0].id == "abc_c1"
+    assert errors == {"missing": "post not found"}
+
+
+def test_ttl_cache_normalizes_positional_keyword_and_default_arguments(reddit_scraper):
+    async def fetch_three_ways():
+        await reddit_scraper.get_post_comments("abc", 100)
+        await reddit_scraper.get_post_comments("abc", limit=100)
+        await reddit_scraper.get_post_comments("abc")
+    
+    asyncio.run(fetch_three_ways())
+    
+    assert reddit_scraper.reddit.fetches == ["abc"]
+
+
+def test_ttl_cache_hands_out_copies(reddit_scraper):
+    first = asyncio.run(reddit_scraper.get_post_comments("abc"))
+    first[0].sentiment = {"compound": 0.9}
+    first[0].sentiment_category = "positive"
+    
+    second = asyncio.run(reddit_scraper.get_post_comments("abc"))
+    
+    assert reddit_scraper.reddit.fetches == ["abc"]
+    assert second[0].sentiment is None
+    assert second[0].sentiment_category is None